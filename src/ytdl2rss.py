@@ -1,29 +1,75 @@
 #!/usr/bin/env python3
 """Create podcast RSS from youtube-dl info JSON."""
 
-import argparse
 import codecs
 import io
 import json
 import os
+import re
 import sys
-import time
 import traceback
 
-from datetime import datetime
-from email.utils import formatdate
+from datetime import date
+from functools import lru_cache
+from urllib.parse import urljoin, urlparse
+from urllib.request import pathname2url, url2pathname
 from xml.sax.saxutils import escape, quoteattr  # nosec
 
 try:
-    from urllib.parse import urljoin, urlparse
-    from urllib.request import pathname2url, url2pathname
+    # Optional, for faster parsing of (large) JSON files
+    import orjson
 except ImportError:
-    from urllib import pathname2url, url2pathname
-    from urlparse import urljoin, urlparse
+    orjson = None
 
 __version__ = '0.1.0'
 
-_JSON_PATH_KEY = object()
+# Playlist keys with text values and the channel element tags for them
+_CHANNEL_TEXT_ELEMENTS = (
+    ('title', '<title>', '</title>'),
+    # Not produced by youtube-dl:
+    ('description', '<description>', '</description>'),
+    ('uploader', '<itunes:author>', '</itunes:author>'),
+    ('webpage_url', '<link>', '</link>'),
+)
+# Escaped content of the channel generator element
+_GENERATOR = escape(os.path.basename(__file__) + ' ' + __version__)
+# Run of digits which may be an integer beyond the 64-bit range of orjson
+_LONG_DIGITS_RE = re.compile(b'[0-9]{19}')
+# Size of buffer for output file, to reduce the number of writes to it
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
+_RFC2822_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_RFC2822_MONTHS = (
+    'Jan',
+    'Feb',
+    'Mar',
+    'Apr',
+    'May',
+    'Jun',
+    'Jul',
+    'Aug',
+    'Sep',
+    'Oct',
+    'Nov',
+    'Dec',
+)
+_RSS_START_TAG = (
+    '<rss version="2.0"'
+    ' xmlns:atom="http://www.w3.org/2005/Atom"'
+    ' xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"'
+    '>'
+)
+# Entry keys with large values which are not used for RSS, to drop on load
+_UNUSED_ENTRY_KEYS = (
+    'automatic_captions',
+    'chapters',
+    'formats',
+    'fragments',
+    'http_headers',
+    'requested_formats',
+    'requested_subtitles',
+    'subtitles',
+    'thumbnails',
+)
 _VERSION_MESSAGE = (
     '%(prog)s '
     + __version__
@@ -39,247 +85,332 @@ FOR A PARTICULAR PURPOSE.  See the Unlicense for details.'''
 )
 
 
-def _resolve_path(path, src_path, dst_path, dst_base):
-    """Resolve a path in src_path to a URL in dst_path served at dst_base."""
-    if not path:
-        return path
-    src_dir = os.path.dirname(src_path)
-    cur_path = os.path.join(src_dir, path)
-    dst_dir = os.path.dirname(dst_path)
-    rel_path = os.path.relpath(cur_path, dst_dir)
-    rel_url = pathname2url(rel_path)
-    return urljoin(dst_base, rel_url)
+# quoteattr for values which repeat across entries, such as media types
+_quoteattr_cached = lru_cache(maxsize=64)(quoteattr)
 
 
-def _resolve_url(url, src_path, dst_path, dst_base):
-    """Resolve a URL in src_path to a URL in dst_path served at dst_base."""
-    url_parts = urlparse(url)
-    if url_parts.scheme:
-        # url is absolute
-        return url
+def _escape(text):
+    """Escape &, <, and > in text, returning text if it contains none."""
+    # Note: Most titles, descriptions, and URLs contain none of these, and
+    # checking for them is much faster than escape's replace calls.
+    if '&' in text or '<' in text or '>' in text:
+        return escape(text)
+    return text
 
-    if url_parts.netloc:
-        # url is scheme-relative
-        return urljoin(dst_base, url)
 
-    # Resolve url from containing file
-    url_path = url2pathname(url)
-    return _resolve_path(url_path, src_path, dst_path, dst_base)
+class _PathResolver:
+    """Resolve paths and URLs in JSON files to URLs for an RSS file."""
 
+    # Note: Slots make attribute lookups, done for every entry, faster.
+    __slots__ = ('dst_base', 'dst_dir', '_dst_prefix', '_src_dirs')
 
-def _ymd_to_rfc2822(datestr):
-    """Convert a date in YYYYMMDD format to RFC 2822 for RSS."""
-    tt = time.strptime(datestr, '%Y%m%d')
-    ts = time.mktime(tt)
-    # Convert to UTC so formatted date is midnight with -0000 (unknown) TZ.
-    # https://stackoverflow.com/a/19238551
-    offset = datetime.fromtimestamp(ts) - datetime.utcfromtimestamp(ts)
-    return formatdate(ts + offset.total_seconds())
+    def __init__(self, dst_path, dst_base):
+        """
+        Initialize resolver for an RSS file.
 
+        :param dst_path: path of the RSS file
+        :param dst_base: URL from which the RSS file is served
+        """
+        # Note: Absolute paths avoid os.getcwd() in each os.path.relpath()
+        self.dst_dir = os.path.abspath(os.path.dirname(dst_path))
+        self.dst_base = dst_base
+        # Prefix of paths in dst_dir, which can be made relative by slicing
+        self._dst_prefix = os.path.join(self.dst_dir, '')
+        # Directory of each JSON file, since many entries share a file
+        self._src_dirs = {}
 
-def get_entry_media_type(entry):
-    """Get media type (i.e. MIME type) from youtube-dl JSON entry info."""
-    ext = entry['ext']
-    acodec = entry.get('acodec')
-    if acodec == 'none':
-        acodec = None
-    vcodec = entry.get('vcodec')
-    if vcodec == 'none':
-        vcodec = None
+    def resolve_path(self, path, src_path):
+        """
+        Resolve a path in src_path to a URL in the RSS file.
 
-    media_type = 'audio/' if acodec and not vcodec else 'video/'
-    if ext == '3g2':
-        media_type += '3gpp2'
-    elif ext == '3gp':
-        media_type += '3gpp'
-    elif ext == 'avi':
-        media_type = 'video/vnd.avi'
-    elif ext in (
-        'f4a',
-        'f4b',
-        'f4p',
-        'm4a',
-        'm4b',
-        'm4p',
-        'm4r',
-    ):
-        # These extensions are intended for audio.
-        # If codecs are not known, assume it is audio.
-        if not acodec and not vcodec:
-            media_type = 'audio/mp4'
+        :param str path: path to resolve, relative to the directory of
+          src_path (or the current directory, if src_path is None)
+        :param str src_path: path of the JSON file which contains path
+
+        :return: URL for path, relative to dst_base (or path, if empty)
+        :rtype: str
+        """
+        if not path:
+            return path
+        try:
+            src_dir = self._src_dirs[src_path]
+        except KeyError:
+            src_dir = os.path.abspath(os.path.dirname(src_path or ''))
+            self._src_dirs[src_path] = src_dir
+        cur_path = os.path.normpath(os.path.join(src_dir, path))
+        dst_prefix = self._dst_prefix
+        if cur_path.startswith(dst_prefix):
+            prefix_len = len(dst_prefix)
+            rel_path = cur_path[prefix_len:]
         else:
-            media_type += 'mp4'
-    elif ext in ('f4v', 'm4v'):
-        media_type += 'mp4'
-    elif ext == 'flv':
-        media_type = 'video/x-flv'
-    elif ext == 'gif':
-        media_type = 'image/gif'
-    elif ext in ('mk3d', 'mks', 'mkv'):
-        media_type += 'x-matroska'
-    elif ext == 'mka':
-        # This extension is intended for audio.
-        # If codecs are not known, assume it is audio.
-        if not acodec and not vcodec:
-            media_type = 'audio/'
-        media_type += 'x-matroska'
-    elif ext == 'mp3':
-        media_type = 'audio/mpeg'
-    elif ext == 'ogg':
-        # Xiph recommends this extension for (vorbis) audio and ogv for video.
-        # If video codec not known, assume it is audio.
-        if not vcodec:
-            media_type = 'audio/'
-        media_type += 'ogg'
-    elif ext == 'opus':
-        # Note: ext: opus could be used to refer to "raw" audio/opus.
-        # However, this has not been observed on ytdl-supported sites.
-        # Since Xiph recommends .opus for Opus-in-Ogg
-        # https://wiki.xiph.org/index.php/MIMETypesCodecs
-        # and the ytdl extractor for media.ccc.de uses it this way,
-        # unconditionally convert to ogg.
-        # If uses of audio/opus are found, consider how to differentiate.
-        ext = 'ogg'
-        if acodec is None:
-            acodec = 'opus'
-        media_type = 'audio/ogg'
-    elif ext == 'ogv':
-        media_type += 'ogg'
-    elif ext == 'wav':
-        media_type = 'audio/vnd.wave'
-    else:
-        media_type += ext
+            rel_path = os.path.relpath(cur_path, self.dst_dir)
+        rel_url = pathname2url(rel_path)
+        return urljoin(self.dst_base, rel_url)
+
+    def resolve_url(self, url, src_path):
+        """
+        Resolve a URL in src_path to a URL in the RSS file.
+
+        :param str url: URL to resolve, which may be absolute, scheme-relative,
+          or relative to the directory of src_path
+        :param str src_path: path of the JSON file which contains url
+
+        :return: URL for url, relative to dst_base (or url, if absolute)
+        :rtype: str
+        """
+        url_parts = urlparse(url)
+        if url_parts.scheme:
+            # url is absolute
+            return url
+
+        if url_parts.netloc:
+            # url is scheme-relative
+            return urljoin(self.dst_base, url)
+
+        # Resolve url from containing file
+        url_path = url2pathname(url)
+        return self.resolve_path(url_path, src_path)
+
+
+# Note: Cached, since entries often share upload dates
+@lru_cache(maxsize=256)
+def _ymd_to_rfc2822(datestr):
+    """Convert a date in YYYYMMDD format to RFC 2822 for RSS."""
+    # Note: Checked before slicing, which would ignore extra characters
+    if len(datestr) != 8 or not datestr.isdigit():
+        raise ValueError('Date not in YYYYMMDD format: ' + repr(datestr))
+    year = int(datestr[:4])
+    month = int(datestr[4:6])
+    day = int(datestr[6:8])
+    # Format midnight with -0000 (unknown) TZ, as email.utils.formatdate would
+    # without the locale-dependent strptime and time zone conversions.
+    return '%s, %02d %s %04d 00:00:00 -0000' % (
+        _RFC2822_DAYS[date(year, month, day).weekday()],
+        day,
+        _RFC2822_MONTHS[month - 1],
+        year,
+    )
+
+
+def _codecs_type(acodec, vcodec):
+    """Get top-level media type for known codecs: audio unless video."""
+    return 'audio' if acodec and not vcodec else 'video'
+
+
+def _audio_ext_type(acodec, vcodec):
+    """Get top-level media type for an extension intended for audio."""
+    # If codecs are not known, assume it is audio.
+    if not acodec and not vcodec:
+        return 'audio'
+    return _codecs_type(acodec, vcodec)
+
+
+def _ogg_ext_type(acodec, vcodec):  # pylint: disable=unused-argument
+    """Get top-level media type for the ogg extension."""
+    # Xiph recommends this extension for (vorbis) audio and ogv for video.
+    # If video codec not known, assume it is audio.
+    return 'video' if vcodec else 'audio'
+
+
+# Top-level type (or function of acodec and vcodec to get it) and subtype
+# for each known extension.  Other extensions use _codecs_type and ext.
+_EXT_MEDIA_TYPES = {
+    '3g2': (_codecs_type, '3gpp2'),
+    '3gp': (_codecs_type, '3gpp'),
+    'avi': ('video', 'vnd.avi'),
+    # These extensions are intended for audio.
+    'f4a': (_audio_ext_type, 'mp4'),
+    'f4b': (_audio_ext_type, 'mp4'),
+    'f4p': (_audio_ext_type, 'mp4'),
+    'm4a': (_audio_ext_type, 'mp4'),
+    'm4b': (_audio_ext_type, 'mp4'),
+    'm4p': (_audio_ext_type, 'mp4'),
+    'm4r': (_audio_ext_type, 'mp4'),
+    'f4v': (_codecs_type, 'mp4'),
+    'm4v': (_codecs_type, 'mp4'),
+    'flv': ('video', 'x-flv'),
+    'gif': ('image', 'gif'),
+    'mk3d': (_codecs_type, 'x-matroska'),
+    'mks': (_codecs_type, 'x-matroska'),
+    'mkv': (_codecs_type, 'x-matroska'),
+    # This extension is intended for audio.
+    'mka': (_audio_ext_type, 'x-matroska'),
+    'mp3': ('audio', 'mpeg'),
+    'ogg': (_ogg_ext_type, 'ogg'),
+    # Note: ext: opus could be used to refer to "raw" audio/opus.
+    # However, this has not been observed on ytdl-supported sites.
+    # Since Xiph recommends .opus for Opus-in-Ogg
+    # https://wiki.xiph.org/index.php/MIMETypesCodecs
+    # and the ytdl extractor for media.ccc.de uses it this way,
+    # unconditionally convert to ogg.
+    # If uses of audio/opus are found, consider how to differentiate.
+    'opus': ('audio', 'ogg'),
+    'ogv': (_codecs_type, 'ogg'),
+    'wav': ('audio', 'vnd.wave'),
+}
+# Extensions for which the codecs parameter is not added to the media type
+_NO_CODECS_EXTS = frozenset(('flv', 'gif', 'mp3'))
+
+
+@lru_cache(maxsize=256)
+def _get_media_type(ext, acodec, vcodec):
+    """Get media type (i.e. MIME type) from extension and known codecs."""
+    main_type, subtype = _EXT_MEDIA_TYPES.get(ext, (_codecs_type, ext))
+    if callable(main_type):
+        main_type = main_type(acodec, vcodec)
+    if ext == 'opus' and acodec is None:
+        # Opus-in-Ogg, as above
+        acodec = 'opus'
+
+    media_type = [main_type, '/', subtype]
 
     # Add codecs parameter from https://tools.ietf.org/html/rfc6381
-    if (acodec or vcodec) and ext not in ('flv', 'gif', 'mp3'):
+    if (acodec or vcodec) and ext not in _NO_CODECS_EXTS:
         # Some extractors (e.g. media.ccc.de) use vcodec: h264
         # Section 3.3 of RFC 6381 specifies codecs must be a FOURCC
         if vcodec == 'h264':
             vcodec = 'avc1'
 
         # Note: Add space after ; as in RFC 6381 section 3.6 Examples
-        media_type += '; codecs='
+        media_type.append('; codecs=')
         if acodec and vcodec:
             # Note: Add space after , as in RFC 6381 section 3.6 Examples
             # TODO: Apply encoding from RFC 2231 if required, see examples
             # in RFC 6381 section 3.1
-            media_type += '"' + vcodec + ', ' + acodec + '"'
+            media_type.extend(('"', vcodec, ', ', acodec, '"'))
         else:
-            media_type += acodec or vcodec
+            media_type.append(acodec or vcodec)
 
-    return media_type
+    return ''.join(media_type)
 
 
-def entry_to_rss(entry, rss, base=None, indent=None):
-    """Convert youtube-dl entry info object to podcast RSS."""
+def get_entry_media_type(entry):
+    """Get media type (i.e. MIME type) from youtube-dl JSON entry info."""
+    acodec = entry.get('acodec')
+    if acodec == 'none':
+        acodec = None
+    vcodec = entry.get('vcodec')
+    if vcodec == 'none':
+        vcodec = None
+
+    # Note: Cached, since few combinations occur and they repeat often
+    return _get_media_type(entry['ext'], acodec, vcodec)
+
+
+def _item_delimiters(indent):
+    """
+    Get strings which open, separate the elements of, and close an item.
+
+    Indenting is applied by these strings, so the elements of each item are
+    formatted the same way with or without indent.
+
+    :param indent: indent string, or None for no indenting or line breaks
+
+    :return: strings to open an item, separate elements, and close an item
+    :rtype: Tuple[str, str, str]
+    """
     if indent is None:
-        indent2 = ''
-        indent3 = ''
-        eol = ''
-    else:
-        indent2 = indent * 2
-        indent3 = indent * 3
-        eol = '\n'
+        return '<item>', '', '</item>'
+
+    indent2 = indent * 2
+    separator = '\n' + indent * 3
+    return (
+        indent2 + '<item>' + separator,
+        separator,
+        '\n' + indent2 + '</item>\n',
+    )
 
-    json_path = entry[_JSON_PATH_KEY]
 
-    rss.write(indent2)
-    rss.write('<item>')
-    rss.write(eol)
+def _entry_to_rss(entry, rss, resolver, delimiters, json_path):
+    """Convert youtube-dl entry info object to RSS with _item_delimiters."""
+    # Accumulate elements so they can be written with a single call
+    # Note: append and get are bound once since this runs for every entry.
+    elements = []
+    append = elements.append
+    get = entry.get
 
-    webpage_url = entry.get('webpage_url')
+    webpage_url = get('webpage_url')
     if webpage_url:
-        rss.write(indent3)
-        rss.write('<guid isPermaLink="true">')
-        rss.write(escape(webpage_url))
-        rss.write('</guid>')
-        rss.write(eol)
+        append('<guid isPermaLink="true">' + _escape(webpage_url) + '</guid>')
     else:
-        rss.write(indent3)
-        rss.write('<guid>')
-        rss.write(escape(entry['id']))
-        rss.write('</guid>')
-        rss.write(eol)
+        append('<guid>' + _escape(entry['id']) + '</guid>')
 
-    title = entry.get('title')
+    title = get('title')
     if title is not None:
-        rss.write(indent3)
-        rss.write('<title>')
-        rss.write(escape(title))
-        rss.write('</title>')
-        rss.write(eol)
+        append('<title>' + _escape(title) + '</title>')
 
-    upload_date = entry.get('upload_date')
+    upload_date = get('upload_date')
     if upload_date is not None:
-        rss.write(indent3)
-        rss.write('<pubDate>')
-        rss.write(_ymd_to_rfc2822(upload_date))
-        rss.write('</pubDate>')
-        rss.write(eol)
+        append('<pubDate>' + _ymd_to_rfc2822(upload_date) + '</pubDate>')
 
     filename = entry['_filename']
-    fileurl = _resolve_path(filename, json_path, rss.name, base)
-    filesize = entry.get('filesize')
+    fileurl = resolver.resolve_path(filename, json_path)
+    filesize = get('filesize')
+    if filesize is None:
+        length_attr = ''
+    elif isinstance(filesize, (int, float)):
+        # Note: Numbers are written directly, since they never need escaping
+        length_attr = ' length="' + str(filesize) + '"'
+    else:
+        length_attr = ' length=' + quoteattr(str(filesize))
     media_type = get_entry_media_type(entry)
-    rss.write(indent3)
-    rss.write('<enclosure')
-    if media_type is not None:
-        rss.write(' type=')
-        rss.write(quoteattr(media_type))
-    if filesize is not None:
-        rss.write(' length=')
-        rss.write(quoteattr(str(filesize)))
-    rss.write(' url=')
-    rss.write(quoteattr(fileurl))
-    rss.write('/>')
-    rss.write(eol)
-
-    thumbnail = entry.get('thumbnail')
+    append(
+        '<enclosure'
+        + (
+            ''
+            if media_type is None
+            else ' type=' + _quoteattr_cached(media_type)
+        )
+        + length_attr
+        + ' url='
+        + quoteattr(fileurl)
+        + '/>'
+    )
+
+    thumbnail = get('thumbnail')
     if thumbnail is not None:
-        thumbnail = _resolve_url(thumbnail, json_path, rss.name, base)
-        rss.write(indent3)
-        rss.write('<itunes:image href=')
-        rss.write(quoteattr(thumbnail))
-        rss.write('/>')
-        rss.write(eol)
+        thumbnail = resolver.resolve_url(thumbnail, json_path)
+        append('<itunes:image href=' + quoteattr(thumbnail) + '/>')
 
     duration = entry['duration']
     if duration is not None:
-        rss.write(indent3)
-        rss.write('<itunes:duration>')
-        rss.write(str(duration))
-        rss.write('</itunes:duration>')
-        rss.write(eol)
+        append('<itunes:duration>' + str(duration) + '</itunes:duration>')
 
-    age_limit = entry.get('age_limit')
+    age_limit = get('age_limit')
     if age_limit is not None:
-        rss.write(indent3)
-        rss.write('<itunes:explicit>')
         # Note: Spotify wants yes/no/clean for item, yes/clean for channel,
         # Google wants yes or absent, Apple wants true/false,
         # W3C Feed Validator wants yes/no/clean
-        rss.write('yes' if age_limit > 0 else 'clean')
-        rss.write('</itunes:explicit>')
-        rss.write(eol)
+        append(
+            '<itunes:explicit>'
+            + ('yes' if age_limit > 0 else 'clean')
+            + '</itunes:explicit>'
+        )
 
     # TODO: <itunes:order> from autonumber (not in .info.json)
     # or playlist_index (may not be relevant/sequential for single file)
     # or sorted order?
 
-    description = entry.get('description')
+    description = get('description')
     if description is not None:
-        rss.write(indent3)
-        rss.write('<description>')
-        rss.write(escape(description))
-        rss.write('</description>')
-        rss.write(eol)
+        append('<description>' + _escape(description) + '</description>')
 
-    rss.write(indent2)
-    rss.write('</item>')
-    rss.write(eol)
+    item_open, separator, item_close = delimiters
+    rss.write(item_open + separator.join(elements) + item_close)
 
 
-def playlist_to_rss(playlist, rss, base=None, indent=None):
+def entry_to_rss(entry, rss, base=None, indent=None, json_path=None):
+    """
+    Convert youtube-dl entry info object to podcast RSS.
+
+    Relative paths in entry are resolved from the directory of json_path,
+    if given, otherwise from the current directory.
+    """
+    resolver = _PathResolver(rss.name, base)
+    _entry_to_rss(entry, rss, resolver, _item_delimiters(indent), json_path)
+
+
+def playlist_to_rss(playlist, rss, base=None, indent=None, json_paths=None):
     """
     Convert youtube-dl playlist info object to podcast RSS.
 
@@ -293,7 +424,15 @@ def playlist_to_rss(playlist, rss, base=None, indent=None):
     https://support.google.com/podcast-publishers/answer/9476656
     https://podcasters.spotify.com/terms/Spotify_Podcast_Delivery_Specification_v1.6.pdf
     https://validator.w3.org/feed/
+
+    Relative paths in the playlist and entries are resolved from the
+    directory of the JSON file which contained them, as given by json_paths,
+    which maps the id() of each object to the path of its JSON file.
+    Otherwise they are resolved from the current directory.
     """
+    if json_paths is None:
+        json_paths = {}
+
     if indent is None:
         indent1 = ''
         indent2 = ''
@@ -305,181 +444,173 @@ def playlist_to_rss(playlist, rss, base=None, indent=None):
         indent3 = indent * 3
         eol = '\n'
 
-    json_path = playlist.get(_JSON_PATH_KEY)
-
-    rss.write(
-        '<rss version="2.0"'
-        + ' xmlns:atom="http://www.w3.org/2005/Atom"'
-        + ' xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd"'
-        + '>'
-    )
-    rss.write(eol)
-    rss.write(indent1)
-    rss.write('<channel>')
-    rss.write(eol)
-
-    title = playlist.get('title')
-    if title is not None:
-        rss.write(indent2)
-        rss.write('<title>')
-        rss.write(escape(title))
-        rss.write('</title>')
-        rss.write(eol)
+    json_path = json_paths.get(id(playlist))
+    resolver = _PathResolver(rss.name, base)
+
+    # Accumulate channel metadata so it can be written with a single call
+    parts = []
+    parts.append(_RSS_START_TAG + eol + indent1 + '<channel>' + eol)
+
+    # Escaped text of channel elements, some of which are repeated in <image>
+    channel_text = {}
+    for key, start_tag, end_tag in _CHANNEL_TEXT_ELEMENTS:
+        value = playlist.get(key)
+        if value is not None:
+            text = _escape(value)
+            channel_text[key] = text
+            parts.append(indent2 + start_tag + text + end_tag + eol)
+
+    # Get latest upload_date of entries (if playlist has none) and combined
+    # age_limit of entries in one pass, stopping once neither can change.
+    upload_date = playlist.get('upload_date') or None
+    need_upload_date = upload_date is None
+    explicit = None
+    has_unknown_age_limit = False
+    for entry in playlist['entries']:
+        if need_upload_date:
+            entry_upload_date = entry.get('upload_date')
+            if entry_upload_date and (
+                upload_date is None or entry_upload_date > upload_date
+            ):
+                upload_date = entry_upload_date
+
+        if not has_unknown_age_limit:
+            age_limit = entry.get('age_limit')
+            if age_limit is None:
+                has_unknown_age_limit = True
+                if not need_upload_date:
+                    break
+            elif age_limit > 0:
+                explicit = 'yes'
+            elif explicit is None:
+                explicit = 'clean'
+    if has_unknown_age_limit:
+        # Omit itunes:explicit, since it is not known for all entries
+        explicit = None
 
-    # Not produced by youtube-dl:
-    description = playlist.get('description')
-    if description is not None:
-        rss.write(indent2)
-        rss.write('<description>')
-        rss.write(escape(description))
-        rss.write('</description>')
-        rss.write(eol)
-
-    uploader = playlist.get('uploader')
-    if uploader is not None:
-        rss.write(indent2)
-        rss.write('<itunes:author>')
-        rss.write(escape(uploader))
-        rss.write('</itunes:author>')
-        rss.write(eol)
-
-    webpage_url = playlist.get('webpage_url')
-    if webpage_url is not None:
-        rss.write(indent2)
-        rss.write('<link>')
-        rss.write(escape(webpage_url))
-        rss.write('</link>')
-        rss.write(eol)
-
-    upload_date = playlist.get('upload_date')
-    if upload_date is None:
-        upload_date = max(
-            entry.get('upload_date') for entry in playlist['entries'] if entry
-        )
     if upload_date is not None:
-        rss.write(indent2)
-        rss.write('<pubDate>')
-        rss.write(_ymd_to_rfc2822(upload_date))
-        rss.write('</pubDate>')
-        rss.write(eol)
+        parts.append(
+            indent2
+            + '<pubDate>'
+            + _ymd_to_rfc2822(upload_date)
+            + '</pubDate>'
+            + eol
+        )
 
     # Not produced by youtube-dl:
     # https://github.com/ytdl-org/youtube-dl/issues/16130
     thumbnail = playlist.get('thumbnail')
     if thumbnail is not None:
-        thumbnail = _resolve_url(thumbnail, json_path, rss.name, base)
-        rss.write(indent2)
-        rss.write('<image>')
-        rss.write(eol)
-
-        rss.write(indent3)
-        rss.write('<url>')
-        rss.write(escape(thumbnail))
-        rss.write('</url>')
-        rss.write(eol)
+        title = channel_text.get('title')
+        webpage_url = channel_text.get('webpage_url')
+        thumbnail = resolver.resolve_url(thumbnail, json_path)
+        parts.append(indent2 + '<image>' + eol)
+        parts.append(indent3 + '<url>' + _escape(thumbnail) + '</url>' + eol)
 
         # "Note, in practice the image <title> and <link> should have the
         # same value as the channel's <title> and <link>."
         # https://www.rssboard.org/rss-specification#ltimagegtSubelementOfLtchannelgt
         if title is not None:
-            rss.write(indent3)
-            rss.write('<title>')
-            rss.write(escape(title))
-            rss.write('</title>')
-            rss.write(eol)
+            parts.append(indent3 + '<title>' + title + '</title>' + eol)
 
         if webpage_url is not None:
-            rss.write(indent3)
-            rss.write('<link>')
-            rss.write(escape(webpage_url))
-            rss.write('</link>')
-            rss.write(eol)
+            parts.append(indent3 + '<link>' + webpage_url + '</link>' + eol)
 
-        rss.write(indent2)
-        rss.write('</image>')
-        rss.write(eol)
+        parts.append(indent2 + '</image>' + eol)
 
         # Apple instructs podcasters to use <itunes:image>, doesn't document
         # standardized <image>.  Include both.
-        rss.write(indent2)
-        rss.write('<itunes:image href=')
-        rss.write(quoteattr(thumbnail))
-        rss.write('/>')
-        rss.write(eol)
-
-    age_limits = [entry.get('age_limit') for entry in playlist['entries']]
-    if age_limits and None not in age_limits:
-        rss.write(indent2)
-        rss.write('<itunes:explicit>')
+        parts.append(
+            indent2 + '<itunes:image href=' + quoteattr(thumbnail) + '/>' + eol
+        )
+
+    if explicit is not None:
         # Note: Spotify wants yes/no/clean for item, yes/clean for channel,
         # Google wants yes or absent, Apple wants true/false,
         # W3C Feed Validator wants yes/no/clean
-        rss.write('yes' if max(age_limits) > 0 else 'clean')
-        rss.write('</itunes:explicit>')
-        rss.write(eol)
+        parts.append(
+            indent2
+            + '<itunes:explicit>'
+            + explicit
+            + '</itunes:explicit>'
+            + eol
+        )
 
     # Provide self link, as recommended
     # https://validator.w3.org/feed/docs/warning/MissingAtomSelfLink.html
     if base:
-        rss.write(indent2)
-        rss.write('<atom:link rel="self" type="application/rss+xml" href=')
-        rss.write(quoteattr(base))
-        rss.write('/>')
-        rss.write(eol)
-
-    rss.write(indent2)
-    rss.write('<generator>')
-    rss.write(escape(os.path.basename(__file__) + ' ' + __version__))
-    rss.write('</generator>')
-    rss.write(eol)
+        parts.append(
+            indent2
+            + '<atom:link rel="self" type="application/rss+xml" href='
+            + quoteattr(base)
+            + '/>'
+            + eol
+        )
 
+    parts.append(indent2 + '<generator>' + _GENERATOR + '</generator>' + eol)
+    rss.write(''.join(parts))
+
+    delimiters = _item_delimiters(indent)
     for entry in playlist['entries']:
-        entry_to_rss(entry, rss, base=base, indent=indent)
+        json_path = json_paths.get(id(entry))
+        _entry_to_rss(entry, rss, resolver, delimiters, json_path)
+
+    rss.write(indent1 + '</channel>' + eol + '</rss>\n')
 
-    rss.write(indent1)
-    rss.write('</channel>')
-    rss.write(eol)
 
-    rss.write('</rss>\n')
+def _parse_json(json_bytes):
+    """Parse JSON from bytes, with the same result as json.loads."""
+    # Note: orjson is only used where it gives the same result as json.
+    # It converts integers beyond 64 bits to float, and rejects NaN and
+    # Infinity (written by json.dump with default allow_nan=True) and
+    # encodings other than UTF-8, for which it raises JSONDecodeError.
+    if orjson is not None and not _LONG_DIGITS_RE.search(json_bytes):
+        try:
+            return orjson.loads(json_bytes)
+        except orjson.JSONDecodeError:
+            pass
+
+    return json.loads(json_bytes)
 
 
 def _load_json(json_path):
     """Load JSON from a file with a given path."""
-    # Note: Binary so load can detect encoding (as in Section 3 of RFC 4627)
+    # Note: Binary so parser can detect encoding (as in Section 3 of RFC 4627)
+    # Read in one call, since files are small, and close before parsing.
     with open(json_path, 'rb') as json_file:
-        try:
-            return json.load(json_file)
-        except Exception as ex:
-            if sys.version_info[0] >= 3:
-                ex2 = Exception('Error loading ' + json_path)
-                exec('raise ex2 from ex')  # nosec
-            else:
-                ex2 = Exception('Error loading ' + json_path + ': ' + str(ex))
-                ex2.__cause__ = ex
-                raise ex2
+        json_bytes = json_file.read()
+
+    try:
+        return _parse_json(json_bytes)
+    except Exception as ex:
+        raise Exception('Error loading ' + json_path) from ex
 
 
 def entries_to_playlist(entries):
     """Combine youtube-dl entries into a playlist with common metadata."""
     # entry playlist metadata keys
-    keys = {
+    keys = (
         'playlist_id',
         'playlist_title',
         'playlist_uploader',
         'playlist_uploader_id',
-    }
+    )
 
     # get playlist metadata, if same for all entries
+    # Note: Only checks keys, rather than building a dict from all items of
+    # each entry, since entries have many more items than keys.
     entries_playlist = None
     for entry in entries:
-        entry_playlist = {k: v for k, v in entry.items() if v and k in keys}
-        if entry_playlist:
-            if entries_playlist is None:
+        if entries_playlist is None:
+            entry_playlist = {k: entry[k] for k in keys if entry.get(k)}
+            if entry_playlist:
                 entries_playlist = entry_playlist
-            elif entry_playlist != entries_playlist:
-                # playlist metadata differs between entries
-                entries_playlist = None
-                break
+        elif any(entry.get(k) for k in keys) and any(
+            (entry.get(k) or None) != entries_playlist.get(k) for k in keys
+        ):
+            # playlist metadata differs between entries
+            entries_playlist = None
+            break
 
     if entries_playlist:
         # Chop "playlist_" from entry playlist keys for use as playlist keys
@@ -491,42 +622,92 @@ def entries_to_playlist(entries):
     return playlist
 
 
+def _load_info_path(info_path):
+    """
+    Load youtube-dl JSON info from a file path, or stdin for -.
+
+    Keys which are not used for RSS are removed from each entry as it is
+    loaded, so memory use does not grow with the (often large) number of
+    formats, subtitles, and thumbnails of every entry.
+    """
+    if info_path == '-':
+        stdin_buffer = getattr(sys.stdin, 'buffer', None)
+        if stdin_buffer is not None:
+            info = _parse_json(stdin_buffer.read())
+        else:
+            # Replaced stdin without a binary buffer (e.g. io.StringIO)
+            info = json.load(sys.stdin)
+    else:
+        info = _load_json(info_path)
+
+    info_entries = info.get('entries')
+    has_entries = isinstance(info_entries, list)
+    has_formats = isinstance(info.get('formats'), list)
+    if has_entries == has_formats:
+        raise ValueError('Unrecognized JSON in ' + info_path)
+
+    for entry in info_entries if has_entries else (info,):
+        for key in _UNUSED_ENTRY_KEYS:
+            entry.pop(key, None)
+
+    return info
+
+
 def _load_info(info_paths):
-    """Load youtube-dl JSON info files into a single playlist object."""
+    """
+    Load youtube-dl JSON info files into a single playlist object.
+
+    :param info_paths: paths of youtube-dl JSON info files, or - for stdin
+
+    :return: playlist object and dict mapping the id() of the playlist and
+      each entry to the path of the JSON file which contained it
+    :rtype: Tuple[dict, Dict[int, str]]
+    """
+    if len(info_paths) > 4 and '-' not in info_paths:
+        # Note: Imported here, since it is only needed to load many files.
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Load files concurrently, since loading is largely I/O-bound
+        # Note: Few files load faster than threads start.  stdin is read on
+        # the main thread, where it would block a worker.
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(info_paths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            infos = list(executor.map(_load_info_path, info_paths))
+    else:
+        infos = [_load_info_path(info_path) for info_path in info_paths]
+
     entries = []
+    # Note: Kept separately from the objects so they only contain JSON values.
+    # Only objects in the returned playlist are added, since id() is only
+    # unique while the object is referenced.
+    json_paths = {}
     info_count = 0
     last_playlist = None
-    for info_path in info_paths:
+    for info_path, info in zip(info_paths, infos):
         info_count += 1
 
-        if info_path == '-':
-            info = json.load(sys.stdin)
-        else:
-            info = _load_json(info_path)
-
+        # Note: _load_info_path checked that info has a list of entries (for
+        # a playlist) or a list of formats (for a video), but not both.
+        # formats was removed, so check entries as it did.
         info_entries = info.get('entries')
-        has_entries = isinstance(info_entries, list)
-        has_formats = isinstance(info.get('formats'), list)
-        if has_entries == has_formats:
-            raise ValueError('Unrecognized JSON in ' + info_path)
-        if has_formats:
+        if not isinstance(info_entries, list):
             # info for a single video
-            info[_JSON_PATH_KEY] = info_path
+            json_paths[id(info)] = info_path
             entries.append(info)
         else:
             # info for a playlist
             last_playlist = info
-            info[_JSON_PATH_KEY] = info_path
             for entry in info_entries:
-                entry[_JSON_PATH_KEY] = info_path
+                json_paths[id(entry)] = info_path
             entries.extend(info_entries)
 
     # If the user provided a single playlist, use it as-is
     # This lets users easily specify whatever metadata they'd like
     if info_count == 1 and last_playlist:
-        return last_playlist
+        json_paths[id(last_playlist)] = info_paths[0]
+        return last_playlist, json_paths
 
-    return entries_to_playlist(entries)
+    return entries_to_playlist(entries), json_paths
 
 
 def _parse_indent(indent):
@@ -537,16 +718,17 @@ def _parse_indent(indent):
         return indent
 
 
-def _parse_args(args, namespace=None):
+def _build_argument_parser():
     """
-    Parse command-line arguments.
-
-    :param args: command-line arguments (usually :py:data:`sys.argv`)
-    :param namespace: object to take the parsed attributes.
+    Build parser for command-line arguments.
 
-    :return: parsed arguments
-    :rtype: argparse.Namespace
+    :return: argument parser
+    :rtype: argparse.ArgumentParser
     """
+    # Note: Imported here, since it is only needed for command-line use and
+    # is one of the slowest modules to import.
+    import argparse
+
     parser = argparse.ArgumentParser(
         usage='%(prog)s [options] <JSON file...>',
         description=__doc__,
@@ -584,7 +766,20 @@ def _parse_args(args, namespace=None):
         metavar='JSON file...',
         help='youtube-dl .info.json files',
     )
-    return parser.parse_args(args, namespace)
+    return parser
+
+
+def _parse_args(args, namespace=None):
+    """
+    Parse command-line arguments.
+
+    :param args: command-line arguments (usually :py:data:`sys.argv`)
+    :param namespace: object to take the parsed attributes.
+
+    :return: parsed arguments
+    :rtype: argparse.Namespace
+    """
+    return _build_argument_parser().parse_args(args, namespace)
 
 
 def main(*argv):
@@ -614,41 +809,63 @@ def main(*argv):
     # and for wider podcast distributor/aggregator support.
     # (e.g. Apple instructs podcasters to use UTF-8.)
     encoding = 'UTF-8'
+    # Represent characters which can not be encoded as XML character
+    # references, so output is valid XML in any encoding.
+    errors = 'xmlcharrefreplace'
+    stdout_buffer = None
     if args.output:
-        writer = io.open(args.output, 'w', encoding=encoding)
-    elif sys.stdout.isatty():
-        # TTY unlikely to interpret XML declaration.  Use Python's encoding.
-        if sys.stdout.encoding is not None:
-            encoding = sys.stdout.encoding
+        writer = io.open(
+            args.output,
+            'w',
+            buffering=_OUTPUT_BUFFER_SIZE,
+            encoding=encoding,
+            errors=errors,
+        )
+    else:
+        if sys.stdout.isatty():
+            # TTY unlikely to interpret XML declaration.  Use Python's encoding.
+            if sys.stdout.encoding is not None:
+                encoding = sys.stdout.encoding
+            else:
+                import locale
+
+                encoding = locale.getpreferredencoding()
+
+        stdout_buffer = getattr(sys.stdout, 'buffer', None)
+        if stdout_buffer is not None:
+            # Encode to the underlying binary stdout with a TextIOWrapper,
+            # which buffers and encodes in C, rather than a codecs
+            # StreamWriter, which encodes each write separately.
+            sys.stdout.flush()
+            writer = io.TextIOWrapper(
+                stdout_buffer,
+                encoding=encoding,
+                errors=errors,
+            )
+        elif sys.stdout.encoding and sys.stdout.encoding.upper() == encoding:
             writer = sys.stdout
         else:
-            import locale
-
-            encoding = locale.getpreferredencoding()
-            writer = codecs.getwriter(encoding)(sys.stdout)
-    elif sys.stdout.encoding and sys.stdout.encoding.upper() == encoding:
-        writer = sys.stdout
-    elif hasattr(sys.stdout, 'buffer'):
-        writer = codecs.getwriter(encoding)(sys.stdout.buffer)
-    else:
-        writer = codecs.getwriter(encoding)(sys.stdout)
+            writer = codecs.getwriter(encoding)(sys.stdout, errors)
 
     try:
-        writer.write('<?xml version="1.0" encoding=')
-        writer.write(quoteattr(encoding))
-        writer.write('?>')
-        if args.indent is not None:
-            writer.write('\n')
+        writer.write(
+            '<?xml version="1.0" encoding='
+            + quoteattr(encoding)
+            + '?>'
+            + ('' if args.indent is None else '\n')
+        )
 
+        playlist, json_paths = _load_info(args.json_files)
         playlist_to_rss(
-            _load_info(args.json_files),
+            playlist,
             writer,
             base=args.base,
             indent=args.indent,
+            json_paths=json_paths,
         )
     except UnicodeEncodeError:
-        # FIXME: Should use a proper XML writer which would represent
-        # characters outside the file encoding using XML entities.
+        # Only possible when writing to sys.stdout directly, which may use
+        # a different error handler (or be unable to encode surrogates).
         traceback.print_exc()
         sys.stderr.write(
             'Consider specifying a different encoding in PYTHONIOENCODING.\n'
@@ -657,6 +874,10 @@ def main(*argv):
     finally:
         if args.output:
             writer.close()
+        elif stdout_buffer is not None:
+            # Detach so stdout.buffer is not closed with writer
+            writer.flush()
+            writer.detach()
 
     return 0
 
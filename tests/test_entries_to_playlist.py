@@ -0,0 +1,65 @@
+"""ytdl2rss.entries_to_playlist unit tests."""
+
+from ytdl2rss import entries_to_playlist
+
+
+def make_entry(video_id, **kwargs):
+    """Make an entry with a given id and playlist metadata."""
+    entry = {'id': video_id, 'title': 'Video ' + video_id}
+    entry.update(kwargs)
+    return entry
+
+
+def test_common_metadata():
+    entries = [
+        make_entry('a', playlist_id='PL1', playlist_title='Playlist'),
+        make_entry('b', playlist_id='PL1', playlist_title='Playlist'),
+    ]
+    assert entries_to_playlist(entries) == {
+        '_type': 'playlist',
+        'entries': entries,
+        'id': 'PL1',
+        'title': 'Playlist',
+    }
+
+
+def test_differing_metadata():
+    entries = [
+        make_entry('a', playlist_id='PL1', playlist_title='Playlist'),
+        make_entry('b', playlist_id='PL1', playlist_title='Other'),
+    ]
+    assert entries_to_playlist(entries) == {
+        '_type': 'playlist',
+        'entries': entries,
+    }
+
+
+def test_additional_metadata():
+    entries = [
+        make_entry('a', playlist_id='PL1'),
+        make_entry('b', playlist_id='PL1', playlist_title='Playlist'),
+    ]
+    assert entries_to_playlist(entries) == {
+        '_type': 'playlist',
+        'entries': entries,
+    }
+
+
+def test_ignores_entries_without_metadata():
+    """Entries without (truthy) playlist metadata do not affect playlist."""
+    entries = [
+        make_entry('a', playlist_id=None, playlist_title=''),
+        make_entry('b', playlist_id='PL1', playlist_title='Playlist'),
+        make_entry('c'),
+        make_entry('d', playlist_id='PL1', playlist_title='Playlist'),
+    ]
+    assert entries_to_playlist(entries) == {
+        '_type': 'playlist',
+        'entries': entries,
+        'id': 'PL1',
+        'title': 'Playlist',
+    }
+
+
+def test_no_entries():
+    assert entries_to_playlist([]) == {'_type': 'playlist', 'entries': []}
@@ -0,0 +1,46 @@
+"""ytdl2rss.entry_to_rss unit tests."""
+
+import io
+
+import pytest
+
+from ytdl2rss import entry_to_rss
+
+
+class NamedStringIO(io.StringIO):
+    """StringIO with a name, as used to resolve paths."""
+
+    name = '/srv/feed/feed.rss'
+
+
+def make_entry(video_id, **kwargs):
+    """Make an entry with a given id and the keys required for output."""
+    entry = {
+        'id': video_id,
+        '_filename': video_id + '.m4a',
+        'duration': 60,
+        'ext': 'm4a',
+    }
+    entry.update(kwargs)
+    return entry
+
+
+filesize_lengths = (
+    (1234, ' length="1234"'),
+    (123.7, ' length="123.7"'),
+    ('1234', ' length="1234"'),
+    ('1"<&', ' length=\'1"&lt;&amp;\''),
+)
+
+
+@pytest.mark.parametrize('filesize,length', filesize_lengths)
+def test_enclosure_length(filesize, length):
+    rss = NamedStringIO()
+    entry_to_rss(make_entry('a', filesize=filesize), rss, base='http://h/')
+    assert length + ' url=' in rss.getvalue()
+
+
+def test_enclosure_no_length():
+    rss = NamedStringIO()
+    entry_to_rss(make_entry('a'), rss, base='http://h/')
+    assert ' length=' not in rss.getvalue()
@@ -0,0 +1,49 @@
+"""ytdl2rss._load_info unit tests."""
+
+import json
+
+from ytdl2rss import _load_info
+
+
+def write_info(tmp_path, name, info):
+    """Write info as JSON to a file and return its path."""
+    info_path = tmp_path / name
+    info_path.write_text(json.dumps(info))
+    return str(info_path)
+
+
+def test_video_with_non_list_entries(tmp_path):
+    # Only a list of entries makes info a playlist
+    video = {
+        'id': 'a',
+        '_filename': 'a.m4a',
+        'duration': 60,
+        'ext': 'm4a',
+        'formats': [],
+        'entries': 'ab',
+    }
+    info_path = write_info(tmp_path, 'a.info.json', video)
+    playlist, json_paths = _load_info([info_path])
+    entries = playlist['entries']
+    assert len(entries) == 1
+    assert entries[0]['entries'] == 'ab'
+    assert 'formats' not in entries[0]
+    assert json_paths == {id(entries[0]): info_path}
+
+
+def test_single_playlist(tmp_path):
+    # A single playlist is used as-is
+    entries = [{'id': 'a', 'formats': []}, {'id': 'b', 'formats': []}]
+    info = {'id': 'PL1', 'title': 'Playlist', 'entries': entries}
+    info_path = write_info(tmp_path, 'pl.json', info)
+    playlist, json_paths = _load_info([info_path])
+    assert playlist == {
+        'id': 'PL1',
+        'title': 'Playlist',
+        'entries': [{'id': 'a'}, {'id': 'b'}],
+    }
+    assert json_paths == {
+        id(playlist): info_path,
+        id(playlist['entries'][0]): info_path,
+        id(playlist['entries'][1]): info_path,
+    }
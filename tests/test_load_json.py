@@ -0,0 +1,75 @@
+"""ytdl2rss._load_json unit tests."""
+
+import math
+
+import pytest
+
+import ytdl2rss
+
+from ytdl2rss import _load_json
+
+orjson_modes = (
+    pytest.param(False, id='json'),
+    pytest.param(
+        True,
+        id='orjson',
+        marks=pytest.mark.skipif(
+            ytdl2rss.orjson is None, reason='orjson not installed'
+        ),
+    ),
+)
+
+
+@pytest.fixture(params=orjson_modes)
+def load_json(request, monkeypatch):
+    """_load_json with and without orjson."""
+    if not request.param:
+        monkeypatch.setattr(ytdl2rss, 'orjson', None)
+    return _load_json
+
+
+def write_json(tmp_path, json_bytes):
+    """Write JSON bytes to a file and return its path."""
+    json_path = tmp_path / 'test.info.json'
+    json_path.write_bytes(json_bytes)
+    return str(json_path)
+
+
+def test_utf8(load_json, tmp_path):
+    json_path = write_json(tmp_path, '{"title": "café"}'.encode('utf-8'))
+    assert load_json(json_path) == {'title': 'café'}
+
+
+def test_nan(load_json, tmp_path):
+    # Written by youtube-dl with json.dump default allow_nan=True
+    json_path = write_json(tmp_path, b'{"id": "a", "average_rating": NaN}')
+    info = load_json(json_path)
+    assert info['id'] == 'a'
+    assert math.isnan(info['average_rating'])
+
+
+def test_utf16(load_json, tmp_path):
+    json_path = write_json(tmp_path, '{"id": "a"}'.encode('utf-16'))
+    assert load_json(json_path) == {'id': 'a'}
+
+
+# Note: Beyond the 64-bit signed and unsigned integer ranges of orjson
+@pytest.mark.parametrize(
+    'value',
+    (
+        18446744073709551616,
+        -9223372036854775809,
+        123456789012345678901234567890,
+    ),
+)
+def test_big_integer(load_json, tmp_path, value):
+    json_path = write_json(tmp_path, b'{"filesize": %d}' % value)
+    info = load_json(json_path)
+    assert info['filesize'] == value
+    assert isinstance(info['filesize'], int)
+
+
+def test_invalid(load_json, tmp_path):
+    json_path = write_json(tmp_path, b'{"id": ')
+    with pytest.raises(Exception, match='Error loading '):
+        load_json(json_path)
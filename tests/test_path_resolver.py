@@ -0,0 +1,109 @@
+"""ytdl2rss._PathResolver unit tests."""
+
+import os
+
+from urllib.parse import urljoin
+from urllib.request import pathname2url
+
+import pytest
+
+from ytdl2rss import _PathResolver
+
+pytestmark = pytest.mark.skipif(os.sep != '/', reason='POSIX paths')
+
+# RSS path, base URL, path, JSON path, expected URL
+# fmt: off
+path_urls = (
+    # Under the RSS directory
+    ('/srv/feed/feed.rss', 'http://h/feed/', 'a.m4a',
+     '/srv/feed/a.info.json', 'http://h/feed/a.m4a'),
+    ('/srv/feed/feed.rss', 'http://h/feed/', 'sub/a b.m4a',
+     '/srv/feed/a.info.json', 'http://h/feed/sub/a%20b.m4a'),
+    ('/srv/feed/feed.rss', 'http://h/feed/', 'a.m4a',
+     '/srv/feed/sub/a.info.json', 'http://h/feed/sub/a.m4a'),
+    ('/srv/feed/feed.rss', None, 'a.m4a',
+     '/srv/feed/sub/a.info.json', 'sub/a.m4a'),
+    # In a parent directory
+    ('/srv/feed/feed.rss', 'http://h/feed/', 'a.m4a',
+     '/srv/a.info.json', 'http://h/a.m4a'),
+    ('/srv/feed/feed.rss', None, 'a.m4a',
+     '/srv/a.info.json', '../a.m4a'),
+    # In a sibling directory which shares a prefix with the RSS directory
+    ('/srv/feed/feed.rss', 'http://h/feed/', 'a.m4a',
+     '/srv/feedx/a.info.json', 'http://h/feedx/a.m4a'),
+    # Absolute
+    ('/srv/feed/feed.rss', 'http://h/feed/', '/srv/feed/a.m4a',
+     '/other/a.info.json', 'http://h/feed/a.m4a'),
+    ('/srv/feed/feed.rss', 'http://h/feed/', '/other/a.m4a',
+     '/srv/feed/a.info.json', 'http://h/other/a.m4a'),
+    # With ..
+    ('/srv/feed/feed.rss', 'http://h/feed/', '../a.m4a',
+     '/srv/feed/sub/a.info.json', 'http://h/feed/a.m4a'),
+    ('/srv/feed/feed.rss', 'http://h/feed/', 'sub/../../a.m4a',
+     '/srv/feed/a.info.json', 'http://h/a.m4a'),
+    # RSS at the filesystem root
+    ('/feed.rss', 'http://h/', 'a.m4a',
+     '/srv/a.info.json', 'http://h/srv/a.m4a'),
+    ('/feed.rss', 'http://h/', '/a.m4a',
+     '/srv/a.info.json', 'http://h/a.m4a'),
+    # Empty
+    ('/srv/feed/feed.rss', 'http://h/feed/', '',
+     '/srv/feed/a.info.json', ''),
+)
+# fmt: on
+
+
+def relpath_url(dst_path, dst_base, path, src_path):
+    """Resolve path to a URL using os.path.relpath for comparison."""
+    src_dir = os.path.dirname(src_path or '')
+    cur_path = os.path.join(src_dir, path)
+    rel_path = os.path.relpath(cur_path, os.path.dirname(dst_path))
+    return urljoin(dst_base, pathname2url(rel_path))
+
+
+@pytest.mark.parametrize(
+    'dst_path,dst_base,path,src_path,expected',
+    path_urls,
+)
+def test_resolve_path(dst_path, dst_base, path, src_path, expected):
+    resolver = _PathResolver(dst_path, dst_base)
+    assert resolver.resolve_path(path, src_path) == expected
+    if path:
+        assert expected == relpath_url(dst_path, dst_base, path, src_path)
+
+
+def test_resolve_path_cached_src_dir():
+    resolver = _PathResolver('/srv/feed/feed.rss', 'http://h/feed/')
+    src_path = '/srv/feed/sub/a.info.json'
+    assert resolver.resolve_path('a.m4a', src_path) == 'http://h/feed/sub/a.m4a'
+    assert resolver.resolve_path('b.m4a', src_path) == 'http://h/feed/sub/b.m4a'
+
+
+@pytest.mark.parametrize('src_path', ('-', None))
+def test_resolve_path_stdout(monkeypatch, tmp_path, src_path):
+    # RSS on stdout and JSON from stdin resolve from the current directory
+    monkeypatch.chdir(tmp_path)
+    resolver = _PathResolver('<stdout>', 'http://h/feed/')
+    assert resolver.resolve_path('a.m4a', src_path) == 'http://h/feed/a.m4a'
+    assert (
+        resolver.resolve_path(str(tmp_path / 'sub' / 'a.m4a'), src_path)
+        == 'http://h/feed/sub/a.m4a'
+    )
+    assert (
+        resolver.resolve_path(str(tmp_path.parent / 'a.m4a'), src_path)
+        == 'http://h/a.m4a'
+    )
+
+
+url_urls = (
+    ('http://e.com/a.jpg', 'http://e.com/a.jpg'),
+    ('//e.com/a.jpg', 'http://e.com/a.jpg'),
+    ('a%20b.jpg', 'http://h/feed/sub/a%20b.jpg'),
+    ('../a.jpg', 'http://h/feed/a.jpg'),
+)
+
+
+@pytest.mark.parametrize('url,expected', url_urls)
+def test_resolve_url(url, expected):
+    resolver = _PathResolver('/srv/feed/feed.rss', 'http://h/feed/')
+    assert resolver.resolve_url(url, '/srv/feed/sub/a.info.json') == expected
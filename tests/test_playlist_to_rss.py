@@ -0,0 +1,111 @@
+"""ytdl2rss.playlist_to_rss unit tests."""
+
+import io
+
+import pytest
+
+from ytdl2rss import playlist_to_rss
+
+
+class NamedStringIO(io.StringIO):
+    """StringIO with a name, as used to resolve paths."""
+
+    name = '/srv/feed/feed.rss'
+
+
+def make_entry(video_id, **kwargs):
+    """Make an entry with a given id and the keys required for output."""
+    entry = {
+        'id': video_id,
+        '_filename': video_id + '.m4a',
+        'duration': 60,
+        'ext': 'm4a',
+    }
+    entry.update(kwargs)
+    return entry
+
+
+def channel_to_rss(playlist):
+    """Get the RSS of the channel elements before the first item."""
+    rss = NamedStringIO()
+    playlist_to_rss(playlist, rss, base='http://h/feed/')
+    return rss.getvalue().split('<item>', 1)[0]
+
+
+def make_playlist(entries, **kwargs):
+    """Make a playlist with given entries."""
+    playlist = {'_type': 'playlist', 'entries': entries}
+    playlist.update(kwargs)
+    return playlist
+
+
+upload_date_pubdates = (
+    ((), None),
+    ((None, None), None),
+    ((None, '20200102'), 'Thu, 02 Jan 2020 00:00:00 -0000'),
+    (('20200102', None, '20191231'), 'Thu, 02 Jan 2020 00:00:00 -0000'),
+    (('20191231', '20200102'), 'Thu, 02 Jan 2020 00:00:00 -0000'),
+    (('20200102', '20191231'), 'Thu, 02 Jan 2020 00:00:00 -0000'),
+)
+
+
+@pytest.mark.parametrize('upload_dates,pubdate', upload_date_pubdates)
+def test_pubdate_from_entries(upload_dates, pubdate):
+    entries = [
+        make_entry(str(i), upload_date=upload_date)
+        for i, upload_date in enumerate(upload_dates)
+    ]
+    rss = channel_to_rss(make_playlist(entries))
+    if pubdate is None:
+        assert '<pubDate>' not in rss
+    else:
+        assert '<pubDate>' + pubdate + '</pubDate>' in rss
+
+
+def test_pubdate_from_playlist():
+    entries = [
+        make_entry('a', upload_date='20200102'),
+        make_entry('b'),
+    ]
+    rss = channel_to_rss(make_playlist(entries, upload_date='20191231'))
+    assert '<pubDate>Tue, 31 Dec 2019 00:00:00 -0000</pubDate>' in rss
+
+
+age_limit_explicits = (
+    ((), None),
+    ((0,), 'clean'),
+    ((0, 0), 'clean'),
+    ((0, 18), 'yes'),
+    ((18, 0), 'yes'),
+    ((None,), None),
+    ((0, None), None),
+    ((18, None), None),
+    ((None, 18), None),
+)
+
+
+@pytest.mark.parametrize('age_limits,explicit', age_limit_explicits)
+@pytest.mark.parametrize('upload_date', (None, '20200102'))
+def test_explicit(age_limits, explicit, upload_date):
+    # Note: The playlist upload_date lets entry checks stop early
+    entries = [
+        make_entry(str(i), age_limit=age_limit)
+        for i, age_limit in enumerate(age_limits)
+    ]
+    playlist = make_playlist(entries)
+    if upload_date is not None:
+        playlist['upload_date'] = upload_date
+    rss = channel_to_rss(playlist)
+    if explicit is None:
+        assert '<itunes:explicit>' not in rss
+    else:
+        assert '<itunes:explicit>' + explicit + '</itunes:explicit>' in rss
+
+
+@pytest.mark.parametrize(
+    'upload_date', ('20200101junk', '2020011', '2020-01-01', '20201301')
+)
+def test_invalid_upload_date(upload_date):
+    playlist = make_playlist([], upload_date=upload_date)
+    with pytest.raises(ValueError):
+        channel_to_rss(playlist)